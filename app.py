@@ -1,100 +1,452 @@
 # Imports I used
+from __future__ import annotations
+
 import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 import streamlit as st
-from typing import List, Dict
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
-from dotenv import load_dotenv
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, List, Iterator, Optional, Tuple
 
-# Loading environment variables
-load_dotenv()
+# LangChain is imported lazily when a model is built, to speed up the first page load.
+# httpx is imported when the connection to Groq is first opened, by the prewarm or a model.
+if TYPE_CHECKING:
+    import httpx
+    from langchain_core.messages import BaseMessage
+    from langchain_groq import ChatGroq
 
+# Loading environment variables, unless the API key is already set
+if not os.environ.get("GROQ_API_KEY"):
+    from dotenv import load_dotenv
+    load_dotenv()
 
-class ContextAwareTranslator:
-    """A translator that provides both translation and contextual information for the user."""
-    
-    def __init__(self, model_name: str = "llama3-8b-8192"):
-        # Verify that an API key for Groq is available
-        if not os.environ.get("GROQ_API_KEY"):
-            st.error("GROQ_API_KEY not found in environment variables. Please set it in your .env file.")
-            st.stop()
+# Faster Groq model, also used for short classification calls like language detection
+FAST_MODEL_NAME = "llama-3.1-8b-instant"
+
+# Groq model used when none is specified
+DEFAULT_MODEL_NAME = FAST_MODEL_NAME
+
+# Groq models for each mode selectable in the sidebar
+MODEL_MODES = {
+    "Fast": FAST_MODEL_NAME,
+    "Quality": "llama-3.3-70b-versatile"
+}
+
+# Inputs longer than this are split into chunks and translated in one batch
+LONG_TEXT_THRESHOLD = 3000
+
+# System prompt used for every translation
+_SYSTEM_TEMPLATE = """You are a helpful translation assistant. Translate the following text from {source_language} to {target_language}.
         
-        # Initialize the model
-        self.model = ChatGroq(model_name=model_name)
+        After the translation, provide:
+        1. A brief cultural context about any idioms or culturally specific references
+        2. Any alternate translations that might be more appropriate in different contexts
+        3. Pronunciation guide for important or difficult words
+        4. Also add a fun fact about penguins! 
         
-        # Available languages
-        self.languages = [
-            "Spanish", "French", "Italian", "German", "Portuguese", 
-            "Chinese", "Japanese", "Korean", "Russian", "Arabic",
-            "Dutch", "Swedish", "Greek", "Hindi", "Turkish"
-        ]
-    
-    def get_available_languages(self) -> List[str]:
-        """Returns the list of available languages."""
-        return self.languages
-    
-    def create_translation_prompt(self) -> ChatPromptTemplate:
-        """Creates a prompt template for translation with context."""
-        system_template = """You are a helpful translation assistant. Translate the following text from {source_language} to {target_language}.
+        """
+
+# System prompt for each chunk of a long text, so the notes aren't repeated per chunk
+_CHUNK_SYSTEM_TEMPLATE = """You are a helpful translation assistant. Translate the following text from {source_language} to {target_language}.
         
-        After the translation, provide:
+        Reply with only the translation, without any notes or commentary.
+        """
+
+# System prompt for the notes that follow a long translation, based on the text's first chunk
+_NOTES_SYSTEM_TEMPLATE = """You are a helpful translation assistant. The following text is the opening of a longer text being translated from {source_language} to {target_language}. Do not translate it.
+        
+        Instead, provide:
         1. A brief cultural context about any idioms or culturally specific references
         2. Any alternate translations that might be more appropriate in different contexts
         3. Pronunciation guide for important or difficult words
         4. Also add a fun fact about penguins! 
         
         """
+
+
+def _split_into_chunks(text: str, 
+                       chunk_chars: int, 
+                       separators: Tuple[str, ...] = ("\n\n", "\n", ". ", "。", " ")) -> List[str]:
+    """
+    Split text into chunks of at most chunk_chars characters, preferring paragraph,
+    then line, sentence and word boundaries, and slicing anything that's still too long.
+    Separators stay attached to the chunks, so joining the chunks gives back the text.
+    """
+    if len(text) <= chunk_chars:
+        return [text]
+    if not separators:
+        return [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+    
+    separator, remaining_separators = separators[0], separators[1:]
+    parts = text.split(separator)
+    pieces = [part + separator for part in parts[:-1]] + [parts[-1]]
+    
+    # Pack pieces into chunks, splitting oversized pieces on the next separator
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if len(piece) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            # Keep the last sub-chunk open so the following pieces can join it
+            *full_chunks, current = _split_into_chunks(piece, chunk_chars, remaining_separators)
+            chunks.extend(full_chunks)
+        elif len(current) + len(piece) > chunk_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# Available languages, in the order shown in the UI
+LANGUAGES = [
+    "Spanish", "French", "Italian", "German", "Portuguese", 
+    "Chinese", "Japanese", "Korean", "Russian", "Arabic",
+    "Dutch", "Swedish", "Greek", "Hindi", "Turkish"
+]
+
+# Selectbox options, so the UI doesn't need a translator instance
+SOURCE_OPTIONS = ["English", *LANGUAGES]
+TARGET_OPTIONS = [*LANGUAGES, "English"]
+
+# Supported target languages and the list shown when validation fails
+_SUPPORTED_LANGUAGES = frozenset(TARGET_OPTIONS)
+_SUPPORTED_LANGUAGES_STR = ", ".join(TARGET_OPTIONS)
+
+
+@dataclass(slots=True, frozen=True)
+class TranslationResult:
+    """The result of translating a piece of text."""
+    original_text: str
+    source_language: str
+    target_language: str
+    result: str
+
+
+def _http_limits() -> httpx.Limits:
+    """Returns the connection pool limits for the Groq HTTP clients."""
+    import httpx
+    
+    # Idle connections are kept long enough for a prewarmed one to still be open at the first translation
+    return httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120)
+
+
+@st.cache_resource
+def _get_http_client() -> httpx.Client:
+    """Returns the HTTP/2 client shared by every Groq model, so concurrent requests reuse one connection."""
+    import httpx
+    
+    return httpx.Client(http2=True, limits=_http_limits(), timeout=30)
+
+
+@st.cache_resource(ttl=60, show_spinner=False)
+def _prewarm_connection() -> None:
+    """
+    Opens a keepalive connection to the Groq API in the background, at most once a minute,
+    so the first translation skips the TLS handshake. Nothing is billed for this request.
+    """
+    # Looked up here, since cached functions need the script thread
+    http_client = _get_http_client()
+    
+    def warm_up():
+        try:
+            http_client.head("https://api.groq.com")
+        except Exception:
+            # A failed warmup only means the first translation opens the connection itself
+            pass
+    
+    threading.Thread(target=warm_up, daemon=True).start()
+
+
+def _build_chat_model(model_name: str, **kwargs) -> ChatGroq:
+    """Creates a Groq chat model that retries transient failures like rate limits with backoff."""
+    # Verify that an API key for Groq is available
+    if not os.environ.get("GROQ_API_KEY"):
+        st.error("GROQ_API_KEY not found in environment variables. Please set it in your .env file.")
+        st.stop()
+    
+    # Deferred so this heavy import only happens once a model is needed
+    from langchain_groq import ChatGroq
+    
+    return ChatGroq(
+        model_name=model_name,
+        max_retries=3,
+        request_timeout=30,
+        http_client=_get_http_client(),
+        **kwargs
+    )
+
+
+class LanguageDetector:
+    """Detects the language of a text with the fast Groq model."""
+    
+    def __init__(self):
+        self.model = _build_chat_model(FAST_MODEL_NAME, temperature=0)
+    
+    def detect_language(self, text: str) -> Optional[str]:
+        """
+        Detect the language of the text.
+        Returns None if the detected language is not one we support.
+        """
+        response = self.model.invoke(
+            "Detect language of the following text. Reply with only the language name in English.\n\n" + text[:200]
+        )
+        detected = response.content.strip().rstrip(".")
+        
+        if detected in _SUPPORTED_LANGUAGES:
+            return detected
+        return None
+
+
+class ContextAwareTranslator:
+    """A translator that provides both translation and contextual information for the user."""
+    
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME):
+        # Initialize the model
+        self.model_name = model_name
+        self.model = _build_chat_model(model_name)
+    
+    def format_translation_prompt(self, 
+                                  text: str, 
+                                  target_language: str, 
+                                  source_language: str = "English", 
+                                  system_template: Optional[str] = None) -> List[BaseMessage]:
+        """
+        Validate the languages and format the prompt messages for a translation.
+        Uses the full translation prompt unless another system_template is given.
+        """
+        # Validate the target language
+        if target_language not in _SUPPORTED_LANGUAGES:
+            raise ValueError(f"Target language '{target_language}' is not supported. Supported languages: {_SUPPORTED_LANGUAGES_STR}")
         
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", system_template),
-            ("user", "{text}")
-        ])
+        from langchain_core.messages import HumanMessage, SystemMessage
         
-        return prompt_template
+        # Build the messages directly instead of going through a prompt template
+        return [
+            SystemMessage(content=(system_template or _SYSTEM_TEMPLATE).format(
+                source_language=source_language,
+                target_language=target_language
+            )),
+            HumanMessage(content=text)
+        ]
     
     def translate(self, 
                   text: str, 
                   target_language: str, 
-                  source_language: str = "English") -> Dict:
+                  source_language: str = "English") -> TranslationResult:
         """
         Translate text to the target language and provide contextual information.
         """
-        # Validate the target language
-        if target_language not in self.languages and target_language != "English":
-            supported = ", ".join(self.languages + ["English"])
-            raise ValueError(f"Target language '{target_language}' is not supported. Supported languages: {supported}")
-        
-        # Create the prompt
-        prompt = self.create_translation_prompt()
-        
-        # Format the prompt with the input values
-        formatted_prompt = prompt.format_messages(
-            source_language=source_language,
-            target_language=target_language,
-            text=text
-        )
+        # Long inputs are translated chunk by chunk
+        if len(text) > LONG_TEXT_THRESHOLD:
+            result = self.translate_long(text, target_language, source_language)
+        else:
+            formatted_prompt = self.format_translation_prompt(text, target_language, source_language)
+            
+            # Get the response from the model
+            result = self.model.invoke(formatted_prompt).content
+        
+        return TranslationResult(text, source_language, target_language, result)
+    
+    def translate_long(self, 
+                       text: str, 
+                       target_language: str, 
+                       source_language: str = "English", 
+                       chunk_chars: int = 2000) -> str:
+        """
+        Translate long text by splitting it into chunks and sending all of them
+        to the model in a single batch. The notes are generated once, from the first chunk.
+        """
+        chunks, formatted_prompts = self._format_long_prompts(text, target_language, source_language, chunk_chars)
+        
+        # Translate all the chunks concurrently
+        responses = self.model.batch(formatted_prompts, config={"max_concurrency": 8})
+        
+        return self._join_long_responses(chunks, responses)
+    
+    @asynccontextmanager
+    async def _async_model(self) -> AsyncIterator[ChatGroq]:
+        """
+        Yields a model with its own HTTP/2 async client, closed afterwards.
+        Async connections are bound to the event loop that opened them, so they're
+        never shared between calls that may each run on their own loop.
+        """
+        import httpx
         
-        # Get the response from the model
-        response = self.model.invoke(formatted_prompt)
+        async with httpx.AsyncClient(http2=True, limits=_http_limits(), timeout=30) as http_async_client:
+            yield _build_chat_model(self.model_name, http_async_client=http_async_client)
+    
+    async def atranslate_long(self, 
+                              text: str, 
+                              target_language: str, 
+                              source_language: str = "English", 
+                              chunk_chars: int = 2000) -> str:
+        """
+        Async version of translate_long. The app itself doesn't call it.
+        """
+        chunks, formatted_prompts = self._format_long_prompts(text, target_language, source_language, chunk_chars)
         
-        return {
-            "original_text": text,
-            "source_language": source_language,
-            "target_language": target_language,
-            "result": response.content
-        }
+        # Translate all the chunks concurrently without blocking the event loop
+        async with self._async_model() as model:
+            responses = await model.abatch(formatted_prompts, config={"max_concurrency": 8})
+        
+        return self._join_long_responses(chunks, responses)
+    
+    def _format_long_prompts(self, 
+                             text: str, 
+                             target_language: str, 
+                             source_language: str, 
+                             chunk_chars: int) -> Tuple[List[str], List[List[BaseMessage]]]:
+        """
+        Split long text into chunks and format a translation-only prompt for each
+        chunk that isn't blank, followed by one prompt for the notes.
+        """
+        chunks = _split_into_chunks(text.replace("\r\n", "\n"), chunk_chars)
+        translatable = [chunk for chunk in chunks if chunk.strip()]
+        
+        formatted_prompts = [
+            self.format_translation_prompt(chunk, target_language, source_language, _CHUNK_SYSTEM_TEMPLATE)
+            for chunk in translatable
+        ]
+        if translatable:
+            formatted_prompts.append(
+                self.format_translation_prompt(translatable[0], target_language, source_language, _NOTES_SYSTEM_TEMPLATE)
+            )
+        
+        return chunks, formatted_prompts
+    
+    def _join_long_responses(self, chunks: List[str], responses: List[BaseMessage]) -> str:
+        """
+        Join the chunk translations, keeping the whitespace that separated the
+        original chunks, and append the notes.
+        """
+        translations = iter(response.content.strip() for response in responses)
+        
+        parts = []
+        for chunk in chunks:
+            if chunk.strip():
+                parts.append(next(translations))
+            parts.append(chunk[len(chunk.rstrip()):])
+        
+        # Whatever is left after the chunk translations is the notes
+        notes = next(translations, "")
+        return "".join(parts).rstrip() + "\n\n" + notes
+    
+    def stream_translate(self, 
+                         text: str, 
+                         target_language: str, 
+                         source_language: str = "English") -> Iterator[str]:
+        """
+        Translate text to the target language, yielding the response as it is generated.
+        """
+        # Long inputs are batched, so the whole result comes back at once
+        if len(text) > LONG_TEXT_THRESHOLD:
+            yield self.translate_long(text, target_language, source_language)
+            return
+        
+        formatted_prompt = self.format_translation_prompt(text, target_language, source_language)
+        
+        # Yield each chunk of the response as soon as the model emits it
+        for chunk in self.model.stream(formatted_prompt):
+            yield chunk.content
+    
+    async def atranslate(self, 
+                         text: str, 
+                         target_language: str, 
+                         source_language: str = "English") -> TranslationResult:
+        """
+        Async version of translate, so several translations can run concurrently
+        with asyncio.gather. The app itself doesn't call it; it's for callers
+        running their own event loop.
+        """
+        # Long inputs are translated chunk by chunk, like in translate
+        if len(text) > LONG_TEXT_THRESHOLD:
+            result = await self.atranslate_long(text, target_language, source_language)
+        else:
+            formatted_prompt = self.format_translation_prompt(text, target_language, source_language)
+            
+            # Get the response from the model without blocking the event loop
+            async with self._async_model() as model:
+                result = (await model.ainvoke(formatted_prompt)).content
+        
+        return TranslationResult(text, source_language, target_language, result)
 
 
-def main():
-    """Main function to run the Streamlit app."""
-    st.set_page_config(
-        page_title="LangWithLang Translator",
-        page_icon="🐧",
-        layout="wide"
-    )
+@st.cache_resource(show_spinner=False)
+def _load_image(path: str) -> Optional[bytes]:
+    """
+    Returns the image bytes at the given path, or None if the file doesn't exist.
+    Cached so the file is only checked and read once per process, not on every rerun.
+    """
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@st.cache_resource
+def get_translator(model_name: str = DEFAULT_MODEL_NAME) -> ContextAwareTranslator:
+    """Returns a translator shared across Streamlit reruns."""
+    return ContextAwareTranslator(model_name)
+
+
+class TranslationCache:
+    """A thread-safe store of translated text, bounded in size and entry age."""
     
-    # Add custom CSS (simplified)
-    st.markdown("""
+    def __init__(self, ttl: float = 3600, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Tuple[str, ...], Tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple[str, ...]) -> Optional[str]:
+        """Returns the cached translation for the key, or None if it's missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, text = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return text
+    
+    def put(self, key: Tuple[str, ...], text: str) -> None:
+        """Stores a translation, evicting the least recently used entries past max_entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@st.cache_resource
+def get_translation_cache() -> TranslationCache:
+    """Returns the translation cache shared across Streamlit sessions."""
+    return TranslationCache(ttl=3600, max_entries=256)
+
+
+@st.cache_resource
+def get_language_detector() -> LanguageDetector:
+    """Returns a language detector shared across Streamlit reruns."""
+    return LanguageDetector()
+
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _cached_detect_language(text: str) -> Optional[str]:
+    """Detect the language of the text, caching the result."""
+    return get_language_detector().detect_language(text)
+
+
+# Custom CSS for the app
+_CSS = """
     <style>
     .stApp {
         max-width: 1200px;
@@ -111,6 +463,9 @@ def main():
         padding: 20px;
         margin-top: 20px;
     }
+    .penguin-spacer {
+        height: 22rem;
+    }
     .footer {
         text-align: center;
         margin-top: 3rem;
@@ -118,7 +473,41 @@ def main():
         font-size: 0.8rem;
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+# Sidebar about text
+_ABOUT_TEXT = (
+    "LangWithLang is your friendly translation companion!"
+    "\n\n"
+    "This context-aware translator doesn't just translate your text; it provides:"
+    "\n\n"
+    "- Cultural context for idioms and expressions\n"
+    "- Alternative translations for different contexts\n"
+    "- Pronunciation guides for important words\n"
+    "- It even gives you a fun fact about penguins at the end of every translation!\n\n"
+    "Powered by LangChain and Groq's LLaMA3 language model."
+)
+
+
+def main():
+    """Main function to run the Streamlit app."""
+    st.set_page_config(
+        page_title="LangWithLang Translator",
+        page_icon="🐧",
+        layout="wide"
+    )
+    
+    # Add custom CSS (simplified)
+    st.markdown(_CSS, unsafe_allow_html=True)
+    
+    # Open the connection to Groq while the user is still typing, once per session
+    if os.environ.get("GROQ_API_KEY") and not st.session_state.get("groq_prewarmed"):
+        st.session_state["groq_prewarmed"] = True
+        _prewarm_connection()
+    
+    # Let the user trade speed for translation quality
+    mode = st.sidebar.radio("Mode", list(MODEL_MODES))
+    model_name = MODEL_MODES[mode]
     
     # Create layout with columns
     main_cols = st.columns([6, 1])
@@ -127,10 +516,6 @@ def main():
         # Header
         st.markdown("<h1 class='main-header'>🐧 LangWithLang Translator</h1>", unsafe_allow_html=True)
         
-        # Create an instance of the translator
-        translator = ContextAwareTranslator()
-        languages = translator.get_available_languages()
-        
         # Main area
         col1, col2 = st.columns(2)
         
@@ -143,7 +528,7 @@ def main():
             
             source_language = st.selectbox(
                 "Source Language",
-                ["English"] + languages,
+                SOURCE_OPTIONS,
                 index=0
             )
         
@@ -151,7 +536,7 @@ def main():
             st.subheader("Output Language")
             target_language = st.selectbox(
                 "Target Language",
-                languages + ["English"]
+                TARGET_OPTIONS
             )
             
             # Translation button
@@ -162,22 +547,31 @@ def main():
             if text_to_translate:
                 with st.spinner(f"Translating to {target_language}..."):
                     try:
-                        # Call the translator
-                        translation_result = translator.translate(
-                            text=text_to_translate,
-                            target_language=target_language,
-                            source_language=source_language
-                        )
+                        # English is the default, so only confirm other source languages
+                        if source_language != "English":
+                            detected_language = _cached_detect_language(text_to_translate)
+                            if detected_language and detected_language != source_language:
+                                st.caption(f"Using detected source language {detected_language} instead of selected {source_language}")
+                                source_language = detected_language
                         
                         # Display the results in a nice format
                         st.markdown("<div class='result-container'>", unsafe_allow_html=True)
                         
-                        # Split the result by sections
-                        result_text = translation_result["result"]
-                        
-                        # Display translation result
                         st.subheader("Translation")
-                        st.write(result_text)
+                        translation_cache = get_translation_cache()
+                        cache_key = (text_to_translate, target_language, source_language, model_name)
+                        cached_text = translation_cache.get(cache_key)
+                        if cached_text is not None:
+                            # Show a cached translation in one go
+                            st.write(cached_text)
+                        else:
+                            # Otherwise stream the translation as it is generated, then cache it
+                            result_text = st.write_stream(get_translator(model_name).stream_translate(
+                                text=text_to_translate,
+                                target_language=target_language,
+                                source_language=source_language
+                            ))
+                            translation_cache.put(cache_key, result_text)
                         
                         st.markdown("</div>", unsafe_allow_html=True)
                         
@@ -187,12 +581,13 @@ def main():
                 st.warning("Please enter text to translate.")
     
     with main_cols[1]:  
-        for _ in range(15):
-            st.write("")
+        # Vertical spacer to line Lang up with the input area
+        st.markdown("<div class='penguin-spacer'></div>", unsafe_allow_html=True)
         
         # Displays Lang the Penguin
-        if os.path.isfile("lang_penguin.png"):
-            st.image("lang_penguin.png", width=100)
+        lang_penguin = _load_image("lang_penguin.png")
+        if lang_penguin is not None:
+            st.image(lang_penguin, width=100)
         else:
             st.markdown("<div style='font-size: 60px; text-align: center;'>🐧</div>", unsafe_allow_html=True)
         
@@ -200,24 +595,15 @@ def main():
     
     # Sidebar content
     st.sidebar.title("About LangWithLang")
-    st.sidebar.info(
-        "LangWithLang is your friendly translation companion!"
-        "\n\n"
-        "This context-aware translator doesn't just translate your text; it provides:"
-        "\n\n"
-        "- Cultural context for idioms and expressions\n"
-        "- Alternative translations for different contexts\n"
-        "- Pronunciation guides for important words\n"
-        "- It even gives you a fun fact about penguins at the end of every translation!\n\n"
-        "Powered by LangChain and Groq's LLaMA3 language model."
-    )
+    st.sidebar.info(_ABOUT_TEXT)
     
     # Add Lang the Penguin to sidebar as well
     st.sidebar.markdown("---")
     st.sidebar.markdown("## Meet Lang the Penguin")
     
-    if os.path.isfile("Penguin.png"):
-        st.sidebar.image("Penguin.png", width=150)
+    penguin = _load_image("Penguin.png")
+    if penguin is not None:
+        st.sidebar.image(penguin, width=150)
    
     
     st.sidebar.markdown("*Lang the Penguin is here to help with your translations!*")